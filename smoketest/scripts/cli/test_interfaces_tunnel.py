@@ -24,6 +24,9 @@ from vyos.template import inc_ip
 
 remote_ip4 = '192.0.2.100'
 remote_ip6 = '2001:db8::ffff'
+# used when changing the remote of an existing tunnel (inc host by 2)
+new_remote_ip4 = inc_ip(remote_ip4, 2)
+new_remote_ip6 = inc_ip(remote_ip6, 2)
 source_if = 'dum2222'
 mtu = 1476
 
@@ -53,38 +56,69 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
         cls.cli_delete(cls, ['interfaces', 'dummy', source_if])
         super().tearDownClass()
 
-    def test_ipv4_encapsulations(self):
+    def test_ipv4_encapsulations_verify(self):
         # When running tests ensure that for certain encapsulation types the
         # local and remote IP address is actually an IPv4 address
 
-        interface = f'tun1000'
-        local_if_addr = f'10.10.200.1/24'
+        interface = 'tun1000'
+        base = self._base_path + [interface]
+        local_if_addr = '10.10.200.1/24'
         for encapsulation in ['ipip', 'sit', 'gre', 'gretap']:
-            self.cli_set(self._base_path + [interface, 'address', local_if_addr])
-            self.cli_set(self._base_path + [interface, 'encapsulation', encapsulation])
-            self.cli_set(self._base_path + [interface, 'source-address', self.local_v6])
-            self.cli_set(self._base_path + [interface, 'remote', remote_ip6])
+            self.cli_set(base + ['address', local_if_addr])
+            self.cli_set(base + ['encapsulation', encapsulation])
+            self.cli_set(base + ['source-address', self.local_v6])
+            self.cli_set(base + ['remote', remote_ip6])
 
             # Encapsulation mode requires IPv4 source-address
             with self.assertRaises(ConfigSessionError):
                 self.cli_commit()
-            self.cli_set(self._base_path + [interface, 'source-address', self.local_v4])
+            self.cli_set(base + ['source-address', self.local_v4])
 
             # Encapsulation mode requires IPv4 remote
             with self.assertRaises(ConfigSessionError):
                 self.cli_commit()
-            self.cli_set(self._base_path + [interface, 'remote', remote_ip4])
-            self.cli_set(self._base_path + [interface, 'source-interface', source_if])
+            self.cli_set(base + ['remote', remote_ip4])
 
             # Source interface can not be used with sit and gretap
             if encapsulation in ['sit', 'gretap']:
+                self.cli_set(base + ['source-interface', source_if])
                 with self.assertRaises(ConfigSessionError):
                     self.cli_commit()
-                self.cli_delete(self._base_path + [interface, 'source-interface'])
+                self.cli_delete(base + ['source-interface'])
 
-            # Check if commit is ok
-            self.cli_commit()
+            # discard this instance - valid configurations are committed in
+            # test_ipv4_encapsulations()
+            self.cli_delete(base)
+
+    def test_ipv4_encapsulations(self):
+        # When running tests ensure that for certain encapsulation types the
+        # local and remote IP address is actually an IPv4 address
+
+        local_if_addr = '10.10.200.1/24'
+
+        # Configure one tunnel per encapsulation and commit them all at once.
+        # Every tunnel uses a dedicated remote address as GRE based tunnels
+        # with the same source-address and remote would require a key
+        tunnels = {}
+        for idx, encapsulation in enumerate(['ipip', 'sit', 'gre', 'gretap']):
+            interface = f'tun{1000 + idx}'
+            base = self._base_path + [interface]
+            remote = inc_ip(remote_ip4, idx)
+            tunnels[interface] = {'encapsulation' : encapsulation, 'remote' : remote}
+
+            self.cli_set(base + ['address', local_if_addr])
+            self.cli_set(base + ['encapsulation', encapsulation])
+            self.cli_set(base + ['source-address', self.local_v4])
+            self.cli_set(base + ['remote', remote])
+            # Source interface can not be used with sit and gretap
+            if encapsulation not in ['sit', 'gretap']:
+                self.cli_set(base + ['source-interface', source_if])
 
+        # Check if commit is ok
+        self.cli_commit()
+
+        for interface, tunnel_config in tunnels.items():
+            encapsulation = tunnel_config['encapsulation']
             conf = get_interface_config(interface)
             if encapsulation not in ['sit', 'gretap']:
                 self.assertEqual(source_if, conf['link'])
@@ -93,46 +127,72 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
             self.assertEqual(mtu, conf['mtu'])
             self.assertEqual(encapsulation, conf['linkinfo']['info_kind'])
             self.assertEqual(self.local_v4, conf['linkinfo']['info_data']['local'])
-            self.assertEqual(remote_ip4,    conf['linkinfo']['info_data']['remote'])
+            self.assertEqual(tunnel_config['remote'], conf['linkinfo']['info_data']['remote'])
             self.assertTrue(conf['linkinfo']['info_data']['pmtudisc'])
 
-            # cleanup this instance
-            self.cli_delete(self._base_path + [interface])
-            self.cli_commit()
-
-    def test_ipv6_encapsulations(self):
+    def test_ipv6_encapsulations_verify(self):
         # When running tests ensure that for certain encapsulation types the
         # local and remote IP address is actually an IPv6 address
 
-        interface = f'tun1010'
-        local_if_addr = f'10.10.200.1/24'
+        interface = 'tun1010'
+        base = self._base_path + [interface]
+        local_if_addr = '10.10.200.1/24'
         for encapsulation in ['ipip6', 'ip6ip6', 'ip6gre', 'ip6gretap']:
-            self.cli_set(self._base_path + [interface, 'address', local_if_addr])
-            self.cli_set(self._base_path + [interface, 'encapsulation', encapsulation])
-            self.cli_set(self._base_path + [interface, 'source-address', self.local_v4])
-            self.cli_set(self._base_path + [interface, 'remote', remote_ip4])
+            self.cli_set(base + ['address', local_if_addr])
+            self.cli_set(base + ['encapsulation', encapsulation])
+            self.cli_set(base + ['source-address', self.local_v4])
+            self.cli_set(base + ['remote', remote_ip4])
 
             # Encapsulation mode requires IPv6 source-address
             with self.assertRaises(ConfigSessionError):
                 self.cli_commit()
-            self.cli_set(self._base_path + [interface, 'source-address', self.local_v6])
+            self.cli_set(base + ['source-address', self.local_v6])
 
             # Encapsulation mode requires IPv6 remote
             with self.assertRaises(ConfigSessionError):
                 self.cli_commit()
-            self.cli_set(self._base_path + [interface, 'remote', remote_ip6])
+            self.cli_set(base + ['remote', remote_ip6])
 
-            # Configure Tunnel Source interface
-            self.cli_set(self._base_path + [interface, 'source-interface', source_if])
             # Source interface can not be used with ip6gretap
             if encapsulation in ['ip6gretap']:
+                self.cli_set(base + ['source-interface', source_if])
                 with self.assertRaises(ConfigSessionError):
                     self.cli_commit()
-                self.cli_delete(self._base_path + [interface, 'source-interface'])
+                self.cli_delete(base + ['source-interface'])
 
-            # Check if commit is ok
-            self.cli_commit()
+            # discard this instance - valid configurations are committed in
+            # test_ipv6_encapsulations()
+            self.cli_delete(base)
+
+    def test_ipv6_encapsulations(self):
+        # When running tests ensure that for certain encapsulation types the
+        # local and remote IP address is actually an IPv6 address
+
+        local_if_addr = '10.10.200.1/24'
+
+        # Configure one tunnel per encapsulation and commit them all at once.
+        # Every tunnel uses a dedicated remote address as the Kernel refuses
+        # to create two ip6tnl tunnels using the same endpoints
+        tunnels = {}
+        for idx, encapsulation in enumerate(['ipip6', 'ip6ip6', 'ip6gre', 'ip6gretap']):
+            interface = f'tun{1010 + idx}'
+            base = self._base_path + [interface]
+            remote = inc_ip(remote_ip6, idx)
+            tunnels[interface] = {'encapsulation' : encapsulation, 'remote' : remote}
+
+            self.cli_set(base + ['address', local_if_addr])
+            self.cli_set(base + ['encapsulation', encapsulation])
+            self.cli_set(base + ['source-address', self.local_v6])
+            self.cli_set(base + ['remote', remote])
+            # Source interface can not be used with ip6gretap
+            if encapsulation not in ['ip6gretap']:
+                self.cli_set(base + ['source-interface', source_if])
+
+        # Check if commit is ok
+        self.cli_commit()
 
+        for interface, tunnel_config in tunnels.items():
+            encapsulation = tunnel_config['encapsulation']
             conf = get_interface_config(interface)
             if encapsulation not in ['ip6gretap']:
                 self.assertEqual(source_if, conf['link'])
@@ -150,26 +210,23 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
 
             self.assertEqual(encapsulation, conf['linkinfo']['info_kind'])
             self.assertEqual(self.local_v6, conf['linkinfo']['info_data']['local'])
-            self.assertEqual(remote_ip6,    conf['linkinfo']['info_data']['remote'])
-
-            # cleanup this instance
-            self.cli_delete(self._base_path + [interface])
-            self.cli_commit()
+            self.assertEqual(tunnel_config['remote'], conf['linkinfo']['info_data']['remote'])
 
     def test_tunnel_parameters_gre(self):
-        interface = f'tun1030'
+        interface = 'tun1030'
+        base = self._base_path + [interface]
         gre_key = '10'
         encapsulation = 'gre'
         tos = '20'
 
-        self.cli_set(self._base_path + [interface, 'encapsulation', encapsulation])
-        self.cli_set(self._base_path + [interface, 'source-address', self.local_v4])
-        self.cli_set(self._base_path + [interface, 'remote', remote_ip4])
+        self.cli_set(base + ['encapsulation', encapsulation])
+        self.cli_set(base + ['source-address', self.local_v4])
+        self.cli_set(base + ['remote', remote_ip4])
 
-        self.cli_set(self._base_path + [interface, 'parameters', 'ip', 'no-pmtu-discovery'])
-        self.cli_set(self._base_path + [interface, 'parameters', 'ip', 'key', gre_key])
-        self.cli_set(self._base_path + [interface, 'parameters', 'ip', 'tos', tos])
-        self.cli_set(self._base_path + [interface, 'parameters', 'ip', 'ttl', '0'])
+        self.cli_set(base + ['parameters', 'ip', 'no-pmtu-discovery'])
+        self.cli_set(base + ['parameters', 'ip', 'key', gre_key])
+        self.cli_set(base + ['parameters', 'ip', 'tos', tos])
+        self.cli_set(base + ['parameters', 'ip', 'ttl', '0'])
 
         # Check if commit is ok
         self.cli_commit()
@@ -184,14 +241,15 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
         self.assertFalse(               conf['linkinfo']['info_data']['pmtudisc'])
 
     def test_gretap_parameters_change(self):
-        interface = f'tun1040'
+        interface = 'tun1040'
+        base = self._base_path + [interface]
         gre_key = '10'
         encapsulation = 'gretap'
         tos = '20'
 
-        self.cli_set(self._base_path + [interface, 'encapsulation', encapsulation])
-        self.cli_set(self._base_path + [interface, 'source-address', self.local_v4])
-        self.cli_set(self._base_path + [interface, 'remote', remote_ip4])
+        self.cli_set(base + ['encapsulation', encapsulation])
+        self.cli_set(base + ['source-address', self.local_v4])
+        self.cli_set(base + ['remote', remote_ip4])
 
         # Check if commit is ok
         self.cli_commit()
@@ -204,31 +262,31 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
         self.assertEqual(remote_ip4,    conf['linkinfo']['info_data']['remote'])
         self.assertEqual(64,            conf['linkinfo']['info_data']['ttl'])
 
-        # Change remote ip address (inc host by 2
-        new_remote = inc_ip(remote_ip4, 2)
-        self.cli_set(self._base_path + [interface, 'remote', new_remote])
+        # Change remote ip address
+        self.cli_set(base + ['remote', new_remote_ip4])
         # Check if commit is ok
         self.cli_commit()
 
         conf = get_interface_config(interface)
-        self.assertEqual(new_remote,    conf['linkinfo']['info_data']['remote'])
+        self.assertEqual(new_remote_ip4, conf['linkinfo']['info_data']['remote'])
 
     def test_erspan_v1(self):
-        interface = f'tun1070'
+        interface = 'tun1070'
+        base = self._base_path + [interface]
         encapsulation = 'erspan'
         ip_key = '77'
         idx = '20'
 
-        self.cli_set(self._base_path + [interface, 'encapsulation', encapsulation])
-        self.cli_set(self._base_path + [interface, 'source-address', self.local_v4])
-        self.cli_set(self._base_path + [interface, 'remote', remote_ip4])
+        self.cli_set(base + ['encapsulation', encapsulation])
+        self.cli_set(base + ['source-address', self.local_v4])
+        self.cli_set(base + ['remote', remote_ip4])
 
-        self.cli_set(self._base_path + [interface, 'parameters', 'erspan', 'index', idx])
+        self.cli_set(base + ['parameters', 'erspan', 'index', idx])
 
         # ERSPAN requires ip key parameter
         with self.assertRaises(ConfigSessionError):
             self.cli_commit()
-        self.cli_set(self._base_path + [interface, 'parameters', 'ip', 'key', ip_key])
+        self.cli_set(base + ['parameters', 'ip', 'key', ip_key])
 
         # Check if commit is ok
         self.cli_commit()
@@ -237,54 +295,59 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
         self.assertEqual(mtu,               conf['mtu'])
         self.assertEqual(interface,         conf['ifname'])
         self.assertEqual(encapsulation,     conf['linkinfo']['info_kind'])
-        self.assertEqual(self.local_v4,     conf['linkinfo']['info_data']['local'])
-        self.assertEqual(remote_ip4,        conf['linkinfo']['info_data']['remote'])
-        self.assertEqual(64,                conf['linkinfo']['info_data']['ttl'])
-        self.assertEqual(f'0.0.0.{ip_key}', conf['linkinfo']['info_data']['ikey'])
-        self.assertEqual(f'0.0.0.{ip_key}', conf['linkinfo']['info_data']['okey'])
-        self.assertEqual(int(idx),          conf['linkinfo']['info_data']['erspan_index'])
-        # version defaults to 1
-        self.assertEqual(1,                 conf['linkinfo']['info_data']['erspan_ver'])
-        self.assertTrue(                    conf['linkinfo']['info_data']['iseq'])
-        self.assertTrue(                    conf['linkinfo']['info_data']['oseq'])
-
-        # Change remote ip address (inc host by 2
-        new_remote = inc_ip(remote_ip4, 2)
-        self.cli_set(self._base_path + [interface, 'remote', new_remote])
+
+        info_data = conf['linkinfo']['info_data']
+        expected = {
+            'local'        : self.local_v4,
+            'remote'       : remote_ip4,
+            'ttl'          : 64,
+            'ikey'         : f'0.0.0.{ip_key}',
+            'okey'         : f'0.0.0.{ip_key}',
+            'erspan_index' : int(idx),
+            # version defaults to 1
+            'erspan_ver'   : 1,
+            'iseq'         : True,
+            'oseq'         : True,
+        }
+        self.assertEqual(expected, {key: info_data.get(key) for key in expected})
+
+        # Change remote ip address
+        self.cli_set(base + ['remote', new_remote_ip4])
         # Check if commit is ok
         self.cli_commit()
 
         conf = get_interface_config(interface)
-        self.assertEqual(new_remote,    conf['linkinfo']['info_data']['remote'])
+        self.assertEqual(new_remote_ip4, conf['linkinfo']['info_data']['remote'])
 
     def test_ip6erspan_v2(self):
-        interface = f'tun1070'
+        interface = 'tun1070'
+        base = self._base_path + [interface]
         encapsulation = 'ip6erspan'
         ip_key = '77'
         erspan_ver = 2
         direction = 'ingress'
 
-        self.cli_set(self._base_path + [interface, 'encapsulation', encapsulation])
-        self.cli_set(self._base_path + [interface, 'source-address', self.local_v6])
-        self.cli_set(self._base_path + [interface, 'remote', remote_ip6])
+        self.cli_set(base + ['encapsulation', encapsulation])
+        self.cli_set(base + ['source-address', self.local_v6])
+        self.cli_set(base + ['remote', remote_ip6])
 
         # ERSPAN requires ip key parameter
         with self.assertRaises(ConfigSessionError):
             self.cli_commit()
-        self.cli_set(self._base_path + [interface, 'parameters', 'ip', 'key', ip_key])
+        self.cli_set(base + ['parameters', 'ip', 'key', ip_key])
 
-        self.cli_set(self._base_path + [interface, 'parameters', 'erspan', 'version', str(erspan_ver)])
+        self.cli_set(base + ['parameters', 'erspan', 'version', str(erspan_ver)])
 
         # ERSPAN index is not valid on version 2
-        self.cli_set(self._base_path + [interface, 'parameters', 'erspan', 'index', '10'])
+        self.cli_set(base + ['parameters', 'erspan', 'index', '10'])
         with self.assertRaises(ConfigSessionError):
             self.cli_commit()
-        self.cli_delete(self._base_path + [interface, 'parameters', 'erspan', 'index'])
+        self.cli_delete(base + ['parameters', 'erspan', 'index'])
 
         # ERSPAN requires direction to be set
         with self.assertRaises(ConfigSessionError):
             self.cli_commit()
-        self.cli_set(self._base_path + [interface, 'parameters', 'erspan', 'direction', direction])
+        self.cli_set(base + ['parameters', 'erspan', 'direction', direction])
 
         # Check if commit is ok
         self.cli_commit()
@@ -293,37 +356,42 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
         self.assertEqual(mtu,               conf['mtu'])
         self.assertEqual(interface,         conf['ifname'])
         self.assertEqual(encapsulation,     conf['linkinfo']['info_kind'])
-        self.assertEqual(self.local_v6,     conf['linkinfo']['info_data']['local'])
-        self.assertEqual(remote_ip6,        conf['linkinfo']['info_data']['remote'])
-        self.assertEqual(64,                conf['linkinfo']['info_data']['ttl'])
-        self.assertEqual(f'0.0.0.{ip_key}', conf['linkinfo']['info_data']['ikey'])
-        self.assertEqual(f'0.0.0.{ip_key}', conf['linkinfo']['info_data']['okey'])
-        self.assertEqual(erspan_ver,        conf['linkinfo']['info_data']['erspan_ver'])
-        self.assertEqual(direction,         conf['linkinfo']['info_data']['erspan_dir'])
-        self.assertTrue(                    conf['linkinfo']['info_data']['iseq'])
-        self.assertTrue(                    conf['linkinfo']['info_data']['oseq'])
-
-        # Change remote ip address (inc host by 2
-        new_remote = inc_ip(remote_ip6, 2)
-        self.cli_set(self._base_path + [interface, 'remote', new_remote])
+
+        info_data = conf['linkinfo']['info_data']
+        expected = {
+            'local'      : self.local_v6,
+            'remote'     : remote_ip6,
+            'ttl'        : 64,
+            'ikey'       : f'0.0.0.{ip_key}',
+            'okey'       : f'0.0.0.{ip_key}',
+            'erspan_ver' : erspan_ver,
+            'erspan_dir' : direction,
+            'iseq'       : True,
+            'oseq'       : True,
+        }
+        self.assertEqual(expected, {key: info_data.get(key) for key in expected})
+
+        # Change remote ip address
+        self.cli_set(base + ['remote', new_remote_ip6])
         # Check if commit is ok
         self.cli_commit()
 
         conf = get_interface_config(interface)
-        self.assertEqual(new_remote,    conf['linkinfo']['info_data']['remote'])
+        self.assertEqual(new_remote_ip6, conf['linkinfo']['info_data']['remote'])
 
     def test_tunnel_src_any_gre_key(self):
-        interface = f'tun1280'
+        interface = 'tun1280'
+        base = self._base_path + [interface]
         encapsulation = 'gre'
         src_addr = '0.0.0.0'
         key = '127'
 
-        self.cli_set(self._base_path + [interface, 'encapsulation', encapsulation])
-        self.cli_set(self._base_path + [interface, 'source-address', src_addr])
+        self.cli_set(base + ['encapsulation', encapsulation])
+        self.cli_set(base + ['source-address', src_addr])
         # GRE key must be supplied with a 0.0.0.0 source address
         with self.assertRaises(ConfigSessionError):
             self.cli_commit()
-        self.cli_set(self._base_path + [interface, 'parameters', 'ip', 'key', key])
+        self.cli_set(base + ['parameters', 'ip', 'key', key])
 
         self.cli_commit()
 
@@ -342,17 +410,19 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
         }
 
         for tunnel, tunnel_config in tunnels.items():
-            self.cli_set(self._base_path + [tunnel, 'encapsulation', tunnel_config['encapsulation']])
+            base = self._base_path + [tunnel]
+            self.cli_set(base + ['encapsulation', tunnel_config['encapsulation']])
             if 'source_interface' in tunnel_config:
-                self.cli_set(self._base_path + [tunnel, 'source-interface', tunnel_config['source_interface']])
+                self.cli_set(base + ['source-interface', tunnel_config['source_interface']])
             if 'remote' in tunnel_config:
-                self.cli_set(self._base_path + [tunnel, 'remote', tunnel_config['remote']])
+                self.cli_set(base + ['remote', tunnel_config['remote']])
 
         # GRE key must be supplied when two or more tunnels are formed to the same desitnation
         with self.assertRaises(ConfigSessionError):
             self.cli_commit()
         for tunnel, tunnel_config in tunnels.items():
-            self.cli_set(self._base_path + [tunnel, 'parameters', 'ip', 'key', tunnel.lstrip('tun')])
+            base = self._base_path + [tunnel]
+            self.cli_set(base + ['parameters', 'ip', 'key', tunnel.lstrip('tun')])
 
         self.cli_commit()
 
@@ -381,11 +451,12 @@ class TunnelInterfaceTest(BasicInterfaceTest.TestCase):
         }
 
         for tunnel, tunnel_config in tunnels.items():
-            self.cli_set(self._base_path + [tunnel, 'encapsulation', tunnel_config['encapsulation']])
+            base = self._base_path + [tunnel]
+            self.cli_set(base + ['encapsulation', tunnel_config['encapsulation']])
             if 'source_interface' in tunnel_config:
-                self.cli_set(self._base_path + [tunnel, 'source-interface', tunnel_config['source_interface']])
+                self.cli_set(base + ['source-interface', tunnel_config['source_interface']])
             if 'remote' in tunnel_config:
-                self.cli_set(self._base_path + [tunnel, 'remote', tunnel_config['remote']])
+                self.cli_set(base + ['remote', tunnel_config['remote']])
 
         self.cli_commit()
 
@@ -35,11 +35,11 @@ def get_config(config=None):
         conf = Config()
     base = ['protocols', 'rpki']
 
-    rpki = conf.get_config_dict(base, key_mangling=('-', '_'), get_first_key=True)
     # Bail out early if configuration tree does not exist
     if not conf.exists(base):
-        rpki.update({'deleted' : ''})
-        return rpki
+        return {'deleted' : ''}
+
+    rpki = conf.get_config_dict(base, key_mangling=('-', '_'), get_first_key=True)
 
     # We have gathered the dict representation of the CLI, but there are default
     # options which we need to update into the dictionary retrived.
@@ -53,17 +53,16 @@ def verify(rpki):
         return None
 
     if 'cache' in rpki:
-        preferences = []
+        preferences = set()
         for peer, peer_config in rpki['cache'].items():
             for mandatory in ['port', 'preference']:
                 if mandatory not in peer_config:
                     raise ConfigError(f'RPKI cache "{peer}" {mandatory} must be defined!')
 
-            if 'preference' in peer_config:
-                preference = peer_config['preference']
-                if preference in preferences:
-                    raise ConfigError(f'RPKI cache with preference {preference} already configured!')
-                preferences.append(preference)
+            preference = peer_config['preference']
+            if preference in preferences:
+                raise ConfigError(f'RPKI cache with preference {preference} already configured!')
+            preferences.add(preference)
 
             if 'ssh' in peer_config:
                 files = ['private_key_file', 'public_key_file', 'known_hosts_file']
@@ -74,7 +73,7 @@ def verify(rpki):
 
                     filename = peer_config['ssh'][file]
                     if not os.path.exists(filename):
-                        raise ConfigError(f'RPKI SSH {file.replace("-","-")} "{filename}" does not exist!')
+                        raise ConfigError(f'RPKI SSH {file.replace("_","-")} "{filename}" does not exist!')
 
     return None
 